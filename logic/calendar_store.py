@@ -1,36 +1,88 @@
 from __future__ import annotations
+from bisect import bisect_left, bisect_right
 from typing import Dict, List, Tuple
-from datetime import datetime as dt
 
-from .utils import _parse_date, _norm_room, _overlaps
+from .utils import _parse_day, _norm_room
 
-# (room_type, room) -> list of (start_dt, end_dt)
-room_calendars: Dict[Tuple[str, str], List[Tuple[dt, dt]]] = {}
+class _IntervalIndex:
+    """
+    Half-open [start, end) intervals of one room, sorted by start and augmented with the
+    running max of end (manual edits may overlap), so overlap tests are O(log n).
+    """
+    __slots__ = ("intervals", "max_ends")
+
+    def __init__(self) -> None:
+        self.intervals: List[Tuple[int, int]] = []
+        self.max_ends: List[int] = []
+
+    def overlaps(self, start: int, end: int) -> bool:
+        # Only intervals starting before `end` can overlap; the latest end among them decides.
+        i = bisect_left(self.intervals, (end,))
+        return i > 0 and self.max_ends[i - 1] > start
+
+    def addi(self, start: int, end: int) -> None:
+        ivs, ends = self.intervals, self.max_ends
+        if not ivs or ivs[-1] <= (start, end):
+            # Chronological arrival (the rebuild path sorts by check-in) → plain append
+            ivs.append((start, end))
+            ends.append(max(ends[-1], end) if ends else end)
+            return
+        i = bisect_right(ivs, (start, end))
+        ivs.insert(i, (start, end))
+        ends.insert(i, max(ends[i - 1], end) if i else end)
+        # Later running maxima must cover the new end too (monotone → stop once they do)
+        for j in range(i + 1, len(ends)):
+            if ends[j] >= end:
+                break
+            ends[j] = end
+
+class RoomCalendars:
+    """Interval indexes of all rooms, keyed by (room_type, room); dates are int day ordinals."""
+    __slots__ = ("_by_room",)
+
+    def __init__(self) -> None:
+        self._by_room: Dict[Tuple[str, str], _IntervalIndex] = {}
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._by_room
+
+    def is_available(self, key: Tuple[str, str], start: int, end: int) -> bool:
+        cal = self._by_room.get(key)
+        return cal is None or not cal.overlaps(start, end)
+
+    def reserve(self, key: Tuple[str, str], start: int, end: int) -> None:
+        cal = self._by_room.get(key)
+        if cal is None:
+            cal = self._by_room[key] = _IntervalIndex()
+        cal.addi(start, end)
+
+    def clear(self) -> None:
+        self._by_room.clear()
+
+# Shared calendars behind the module-level API (cleared in place on rebuild, never rebound)
+room_calendars = RoomCalendars()
+
+def _key(room_type: str, room: str) -> Tuple[str, str]:
+    return (str(room_type).strip(), _norm_room(room))
 
 def is_available(room_type: str, room: str, check_in_str: str, check_out_str: str) -> bool:
-    key = (str(room_type).strip(), _norm_room(room))
-    check_in = _parse_date(check_in_str)
-    check_out = _parse_date(check_out_str)
+    key = _key(room_type, room)
     if key not in room_calendars:
-        room_calendars[key] = []
-    for (start, end) in room_calendars[key]:
-        if _overlaps(check_in, check_out, start, end):
-            return False
-    return True
+        return True
+    return room_calendars.is_available(key, _parse_day(check_in_str), _parse_day(check_out_str))
 
 def reserve(room_type: str, room: str, check_in_str: str, check_out_str: str) -> None:
-    key = (str(room_type).strip(), _norm_room(room))
-    check_in = _parse_date(check_in_str)
-    check_out = _parse_date(check_out_str)
-    if key not in room_calendars:
-        room_calendars[key] = []
-    room_calendars[key].append((check_in, check_out))
+    room_calendars.reserve(_key(room_type, room), _parse_day(check_in_str), _parse_day(check_out_str))
 
 def rebuild_calendar_from_assignments(assigned_df) -> None:
     """Rebuild internal calendars from an assigned table (for manual edits)."""
-    global room_calendars
-    room_calendars = {}
+    room_calendars.clear()
     if assigned_df is None or assigned_df.empty:
         return
-    for _, row in assigned_df.iterrows():
-        reserve(row["room_type"], row["room"], row["check_in"], row["check_out"])
+    # Parse each date column once up front, then work on ints only
+    starts = [_parse_day(v) for v in assigned_df["check_in"].to_numpy()]
+    ends = [_parse_day(v) for v in assigned_df["check_out"].to_numpy()]
+    rows = zip(starts, ends, assigned_df["room_type"].to_numpy(), assigned_df["room"].to_numpy())
+    # Reserve in check-in order so every room's intervals arrive already sorted
+    for start, end, room_type, room in sorted(rows, key=lambda r: r[0]):
+        room_calendars.reserve(_key(room_type, room), start, end)
@@ -1,56 +1,87 @@
 # logic/diagnostics.py
 
 from __future__ import annotations
-from typing import Dict, List, Tuple, DefaultDict
+from datetime import date
+from typing import Dict, List, Optional, Tuple, DefaultDict
+import numpy as np
 import pandas as pd
 
-from .utils import _parse_date, _norm_room, _room_sort_key, _overlaps, are_serial, DATE_FMT
-from .core import assign_rooms  # (optional; not used here but handy if you extend)
+from .utils import (
+    _parse_day, _norm_room, _room_sort_key, extract_room_number, DATE_FMT,
+)
+from .solver import assign_rooms  # (optional; not used here but handy if you extend)
+
+def _fmt_day(d: int) -> str:
+    return date.fromordinal(d).strftime(DATE_FMT)
+
+_ASSIGNED_TEXT_COLS = ["family", "room_type", "check_in", "check_out"]
+
+def _norm_df(df: pd.DataFrame, str_cols, room_cols=()) -> pd.DataFrame:
+    """Copy of df with str_cols as stripped strings and room_cols through _norm_room."""
+    out = df.copy()
+    for c in str_cols:
+        out[c] = df[c].astype(object).map(str).str.strip()
+    for c in room_cols:
+        out[c] = df[c].map(_norm_room)
+    return out
 
 def _schedules_from_df(assigned_df: pd.DataFrame):
+    """(room_type, room) → [(start day, end day, family)], days as int ordinals.
+    Expects the assigned table already normalized by _norm_df."""
     sched: Dict[Tuple[str, str], List[Tuple]] = {}
     if assigned_df is None or assigned_df.empty:
         return sched
-    for _, row in assigned_df.iterrows():
-        rt = str(row["room_type"]).strip()
-        rm = _norm_room(row["room"])
-        key = (rt, rm)
-        sched.setdefault(key, []).append(
-            (_parse_date(row["check_in"]), _parse_date(row["check_out"]), str(row["family"]))
-        )
+    starts = assigned_df["check_in"].map(_parse_day)
+    ends = assigned_df["check_out"].map(_parse_day)
+    for rt, rm, s, e, famname in zip(
+        assigned_df["room_type"], assigned_df["room"], starts, ends, assigned_df["family"]
+    ):
+        sched.setdefault((rt, rm), []).append((s, e, famname))
     return sched
 
 def _conflicts_on(sched, room_type: str, room: str, start, end):
     key = (str(room_type).strip(), _norm_room(room))
     out = []
     for s, e, fam in sched.get(key, []):
-        if _overlaps(s, e, start, end):
-            out.append((fam, s.strftime(DATE_FMT), e.strftime(DATE_FMT)))
+        if s < end and start < e:  # half-open overlap on day ints
+            out.append((fam, _fmt_day(s), _fmt_day(e)))
     return out
 
 def _rooms_by_type_from_df(rooms_df: pd.DataFrame):
-    rdf = rooms_df.copy()
-    rdf["room_type"] = rdf["room_type"].astype(str).str.strip()
-    rdf["room"] = rdf["room"].astype(str).str.strip()
-    return (
-        rdf.groupby("room_type")["room"]
-        .apply(lambda x: sorted(map(_norm_room, x), key=_room_sort_key))
-        .to_dict()
-    )
-
-def _perfect_matching(choices: Dict[int, List[str]]) -> bool:
-    matchR: Dict[str, int] = {}
-    def dfs(u: int, seen: set) -> bool:
-        for v in choices.get(u, []):
-            if v in seen:
+    rdf = pd.DataFrame({
+        "room_type": rooms_df["room_type"].astype(str).str.strip(),
+        "room": rooms_df["room"].astype(str).str.strip(),
+    })
+    # Numeric part once per distinct label (same order as _room_sort_key), then a single sort
+    nums = {r: extract_room_number(r) for r in rdf["room"].unique()}
+    rdf["_num"] = rdf["room"].map(lambda r: float("inf") if nums[r] is None else nums[r])
+    rdf = rdf.sort_values(["room_type", "_num", "room"], kind="stable")
+    # Already grouped by the sort: one list aggregation, no per-group Python loop
+    return rdf.groupby("room_type", sort=False)["room"].agg(list).to_dict()
+
+def _perfect_matching(choices: Dict[int, List[int]], n_rooms: int) -> bool:
+    """Rows → rooms by window position (0..n_rooms-1); True if every row gets its own room."""
+    if len(choices) == 2:
+        # Most families split over two rooms: Hall's condition, no augmenting-path search
+        a, b = (set(c) for c in choices.values())
+        return bool(a) and bool(b) and len(a | b) >= 2
+    # Augmenting paths over int positions: a flat owner list and a bitmask of visited rooms
+    matchR = [-1] * n_rooms
+    def dfs(u: int, seen: int) -> Tuple[bool, int]:
+        for v in choices.get(u, ()):
+            if seen >> v & 1:
                 continue
-            seen.add(v)
-            if v not in matchR or dfs(matchR[v], seen):
+            seen |= 1 << v
+            if matchR[v] < 0:
                 matchR[v] = u
-                return True
-        return False
+                return True, seen
+            ok, seen = dfs(matchR[v], seen)
+            if ok:
+                matchR[v] = u
+                return True, seen
+        return False, seen
     for u in choices.keys():
-        if not dfs(u, set()):
+        if not dfs(u, 0)[0]:
             return False
     return True
 
@@ -63,8 +94,11 @@ def explain_soft_constraints(
     if assigned_df is None or assigned_df.empty:
         return pd.DataFrame(results)
 
-    sched = _schedules_from_df(assigned_df)
+    # Assigned table normalized once; every block below reads these columns as they are
+    asg = _norm_df(assigned_df, _ASSIGNED_TEXT_COLS, room_cols=["room"])
+    sched = _schedules_from_df(asg)
     rooms_by_type = _rooms_by_type_from_df(rooms_df)
+    room_sets_by_type = {rt: frozenset(rms) for rt, rms in rooms_by_type.items()}
 
     fam = families_df.copy()
     if "family" not in fam.columns:
@@ -80,21 +114,21 @@ def explain_soft_constraints(
     fam["forced_room"] = fam["forced_room"].fillna("").astype(str).str.strip()
 
     # A) Forced not met
-    forced_rows = fam[fam["forced_room"].astype(str).str.strip() != ""]
-    for _, src in forced_rows.iterrows():
+    # (family, room_type, check_in, check_out) → room of the first matching assigned row,
+    # built once so every forced row is a single dict lookup.
+    assigned_room_of: Dict[Tuple[str, str, str, str], str] = {}
+    for key, room in zip(zip(*(asg[c] for c in _ASSIGNED_TEXT_COLS)), asg["room"]):
+        assigned_room_of.setdefault(key, room)
+    forced_rows = fam[fam["forced_room"].ne("")]  # already filled + stripped above
+    for src in forced_rows.to_dict("records"):
         fml = str(src["family"]).strip()
         rt = str(src["room_type"]).strip()
         ci = str(src["check_in"]).strip()
         co = str(src["check_out"]).strip()
         fr = _norm_room(src["forced_room"])
 
-        mask = (
-            (assigned_df["family"].astype(str).str.strip() == fml) &
-            (assigned_df["room_type"].astype(str).str.strip() == rt) &
-            (assigned_df["check_in"].astype(str).str.strip() == ci) &
-            (assigned_df["check_out"].astype(str).str.strip() == co)
-        )
-        if not mask.any():
+        assigned_room = assigned_room_of.get((fml, rt, ci, co))
+        if assigned_room is None:
             results.append({
                 "violation": "forced_not_met",
                 "family": fml, "room_type": rt,
@@ -107,13 +141,11 @@ def explain_soft_constraints(
             })
             continue
 
-        assigned_row = assigned_df.loc[mask].iloc[0]
-        assigned_room = _norm_room(assigned_row["room"])
         if assigned_room == fr:
             continue
 
-        in_type = fr in rooms_by_type.get(rt, [])
-        start = _parse_date(ci); end = _parse_date(co)
+        in_type = fr in room_sets_by_type.get(rt, frozenset())
+        start = _parse_day(ci); end = _parse_day(co)
         if not in_type:
             reason = f"forced room {fr} does not exist under room_type '{rt}'."
             blockers = ""
@@ -138,14 +170,30 @@ def explain_soft_constraints(
         })
 
     # B) Non-serial
+    # Per room_type, every scheduled stay packed once as flat arrays:
+    # (position in rooms_by_type[rt], start day, end day, family)
+    packed_stays: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def stays_of_type(rt: str):
+        if rt not in packed_stays:
+            pos, starts, ends, fams = [], [], [], []
+            for r, rm in enumerate(map(_norm_room, rooms_by_type.get(rt, []))):
+                for s, e, famname in sched.get((rt, rm), ()):
+                    pos.append(r); starts.append(s); ends.append(e); fams.append(famname)
+            packed_stays[rt] = (
+                np.array(pos, dtype=np.intp),
+                np.array(starts, dtype=np.int64),
+                np.array(ends, dtype=np.int64),
+                np.array(fams, dtype=object),
+            )
+        return packed_stays[rt]
+
+    # (family, room_type) → its rows, in one zip over the normalized columns (no iterrows)
     by_family_type: DefaultDict[Tuple[str, str], List[dict]] = {}  # type: ignore
-    for _, row in assigned_df.iterrows():
-        key = (str(row["family"]).strip(), str(row["room_type"]).strip())
-        by_family_type.setdefault(key, []).append({
-            "room": _norm_room(row["room"]),
-            "check_in": str(row["check_in"]).strip(),
-            "check_out": str(row["check_out"]).strip(),
-        })
+    for fml, rt, room, ci, co in zip(
+        asg["family"], asg["room_type"], asg["room"], asg["check_in"], asg["check_out"],
+    ):
+        by_family_type.setdefault((fml, rt), []).append({"room": room, "check_in": ci, "check_out": co})
 
     for (fml, rt), rows in by_family_type.items():
         if len(rows) <= 1:
@@ -153,71 +201,90 @@ def explain_soft_constraints(
         rooms_now = [r["room"] for r in rows]
         rooms_sorted = sorted(rooms_now, key=_room_sort_key)
 
-        serial_ok = True
-        for i in range(len(rooms_sorted) - 1):
-            if not are_serial(rooms_sorted[i], rooms_sorted[i + 1]):
-                serial_ok = False
-                break
-        if serial_ok:
+        # Serial ⇔ room numbers step by exactly one (ascending after the sort)
+        nums = [extract_room_number(r) for r in rooms_sorted]
+        if None not in nums and all(b - a == 1 for a, b in zip(nums, nums[1:])):
             continue
 
         all_rooms = rooms_by_type.get(rt, [])
         k = len(rows)
         feasible_block: List[str] = []
         best_block: List[str] = []
-        best_avail = -1
-
-        # schedules excluding this family's own reservations
-        sched_excl = {}
-        for key, intervals in sched.items():
-            rt_key, rm_key = key
-            if rt_key != rt:
-                sched_excl[key] = intervals[:]
-                continue
-            kept = [(s, e, famname) for (s, e, famname) in intervals if famname != fml]
-            if kept:
-                sched_excl[key] = kept
-
-        rows_with_dt = [{
-            "idx": i,
-            "start": _parse_date(r["check_in"]),
-            "end": _parse_date(r["check_out"]),
-        } for i, r in enumerate(rows)]
-
-        for i in range(max(0, len(all_rooms) - k + 1)):
-            block = list(map(_norm_room, all_rooms[i:i+k]))
-            choices = {}
-            avail_pairs = 0
-            for rinfo in rows_with_dt:
-                opts = []
-                for rm in block:
-                    key = (rt, rm)
-                    ok = True
-                    for s, e, _ in sched_excl.get(key, []):
-                        if _overlaps(s, e, rinfo["start"], rinfo["end"]):
-                            ok = False; break
-                    if ok:
-                        opts.append(rm)
-                choices[rinfo["idx"]] = opts
-                avail_pairs += len(opts)
-
-            if all(choices[j] for j in choices) and _perfect_matching(choices):
-                feasible_block = block
-                break
-
-            if avail_pairs > best_avail:
-                best_avail = avail_pairs
-                best_block = block
+
+        # Lower bound: a block gives each row its own room, so fewer than k rooms of the
+        # type means no block exists — skip the window search.
+        if k <= len(all_rooms):
+            # free[r][j] ⇔ room r has no other family's stay overlapping row j — one NumPy
+            # broadcast (stays × rows) over the type's packed stays, OR-reduced per room.
+            row_start = np.array([_parse_day(r["check_in"]) for r in rows], dtype=np.int64)
+            row_end = np.array([_parse_day(r["check_out"]) for r in rows], dtype=np.int64)
+            st_room, st_start, st_end, st_family = stays_of_type(rt)
+            clash = (st_family != fml)[:, None] & (st_start[:, None] < row_end) & (row_start < st_end[:, None])
+            busy = np.zeros((len(all_rooms), k), dtype=bool)
+            np.logical_or.at(busy, st_room, clash)
+            free_arr = ~busy
+            free = free_arr.tolist()
+
+            # A perfect matching uses every room of the window, so only runs of k rooms that are
+            # each free for some row can hold a serial block: bit i of `runs` marks such a run
+            # starting at room i (SWAR run search over a bitset of usable rooms).
+            usable = 0
+            for r in np.flatnonzero(free_arr.any(axis=1)).tolist():
+                usable |= 1 << r
+            runs = usable
+            for _ in range(k - 1):
+                runs &= runs >> 1
+
+            if (row_start == row_start[0]).all() and (row_end == row_end[0]).all():
+                # Same dates on every row (the common case): rooms are free for all rows or
+                # for none, so the first run of k usable rooms is a block as it stands.
+                if runs:
+                    i = (runs & -runs).bit_length() - 1
+                    feasible_block = list(map(_norm_room, all_rooms[i:i+k]))
+            else:
+                # Every row also needs a free room inside the window: OR-smear each row's free-room
+                # bitmap over k positions and keep only windows covered for all rows. A row that is
+                # free nowhere empties `runs` at once and the search is skipped.
+                for j in range(k):
+                    row_mask = 0
+                    for r in np.flatnonzero(free_arr[:, j]).tolist():
+                        row_mask |= 1 << r
+                    cover = row_mask
+                    for _ in range(k - 1):
+                        cover |= cover >> 1
+                    runs &= cover
+                    if not runs:
+                        break
+
+                while runs:
+                    low = runs & -runs
+                    runs ^= low
+                    i = low.bit_length() - 1
+                    block = list(map(_norm_room, all_rooms[i:i+k]))
+                    window = free[i:i+k]
+                    choices = {j: [r for r, ok in enumerate(window) if ok[j]] for j in range(k)}
+                    if all(choices[j] for j in choices) and _perfect_matching(choices, k):
+                        feasible_block = block
+                        break
+
+            if not feasible_block:
+                # Closest block: first window with the most free (room, row) pairs
+                csum = np.concatenate(([0], np.cumsum(free_arr.sum(axis=1))))
+                i = int(np.argmax(csum[k:] - csum[:-k]))
+                best_block = list(map(_norm_room, all_rooms[i:i+k]))
 
         if feasible_block:
             reason = "serial block was feasible without moving other families; solver chose non-serial."
             blockers = ""
         else:
             notes = []
+            # Other families' stays in the block's rooms, read straight from the schedule
+            # (no per-family copy of it with this family's own stays filtered out)
             for rm in best_block:
-                key = (rt, rm)
-                for s, e, famname in sched_excl.get(key, []):
-                    notes.append(f"{rm} blocked by {famname} ({s.strftime(DATE_FMT)}–{e.strftime(DATE_FMT)})")
+                for s, e, famname in sched.get((rt, rm), ()):
+                    if famname == fml:
+                        continue
+                    notes.append(f"{rm} blocked by {famname} ({_fmt_day(s)}–{_fmt_day(e)})")
             blockers = "; ".join(notes[:6])
             reason = f"no contiguous serial block of size {k} was free given other families."
 
@@ -239,12 +306,18 @@ def explain_soft_constraints(
         except Exception:
             return None
 
-    for fam, grp in assigned_df.groupby("family"):
-        types = [str(t).strip() for t in grp["room_type"]]
-        room_map = {
-            rt: to_int(grp.loc[grp["room_type"] == rt, "room"].iat[0])
-            for rt in types
-        }
+    # Per family, from the shared normalized columns in one pass: its room types (row order)
+    # and the room (as int) of the first row of every type — no per-family sub-frames
+    types_of: Dict[str, List[str]] = {}
+    first_room_int: Dict[Tuple[str, str], Optional[int]] = {}
+    for f, t, r in zip(asg["family"], asg["room_type"], asg["room"]):
+        types_of.setdefault(f, []).append(t)
+        if (f, t) not in first_room_int:
+            first_room_int[(f, t)] = to_int(r)
+
+    for fam in sorted(types_of):  # same family order as groupby("family")
+        types = types_of[fam]
+        room_map = {rt: first_room_int[(fam, rt)] for rt in types}
 
         # Rule 1: 'שטח' + 'זוגי'
         if "שטח" in types and "זוגי" in types:
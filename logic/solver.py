@@ -2,51 +2,29 @@
 
 from __future__ import annotations
 
+import os
+import sys
 import time
-import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Callable, Dict, List, Optional, Tuple
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pickle import PicklingError
 
 import pandas as pd
 
-# -----------------------------------------------------------------------------
-# Safe import of are_serial (fallback if not present)
-# -----------------------------------------------------------------------------
+from .utils import is_field_type, extract_room_number, field_area_id
+
+# Optional: OR-Tools CP-SAT completes types the backtracker leaves partial
 try:
-    from .utils import are_serial  # your existing helper
-except Exception:
-    def are_serial(a: str, b: str) -> bool:
-        """Fallback: rooms are 'serial' if their numeric parts differ by 1."""
-        def num(x):
-            m = re.search(r"(\d+)", str(x))
-            return int(m.group(1)) if m else None
-        na, nb = num(a), num(b)
-        return na is not None and nb is not None and abs(na - nb) == 1
+    from ortools.sat.python import cp_model
+except ImportError:
+    cp_model = None
 
 # -----------------------------------------------------------------------------
 # שטח helpers and preferences
 # -----------------------------------------------------------------------------
-def is_field_type(room_type: str) -> bool:
-    s = (room_type or "").strip().lower()
-    return "שטח" in s or "field" in s or "camp" in s or "pitch" in s
-
-def extract_room_number(room: str) -> Optional[int]:
-    if room is None:
-        return None
-    m = re.search(r"(\d+)", str(room))
-    return int(m.group(1)) if m else None
-
-def field_area_id(num: Optional[int]) -> Optional[int]:
-    """Area 1 = 1..5, Area 2 = 6..18; else None."""
-    if num is None:
-        return None
-    if 1 <= num <= 5:
-        return 1
-    if 6 <= num <= 18:
-        return 2
-    return None
-
 FIELD_ONE_ROOM_PREF    = [8, 12, 17, 1, 18]   # size=1
 FIELD_TWO_ROOMS_PREF   = [16, 18]             # size=2
 FIELD_THREE_ROOMS_PREF = [12, 13, 14]         # size=3
@@ -75,11 +53,18 @@ FIELD_CLUSTERS = [
     {16, 18},
 ]
 LAST_PRIORITY_ROOM = 15
+# Clusters as bitmasks over room numbers (bit n ⇔ room n) for the per-candidate check
+FIELD_CLUSTER_MASKS = [sum(1 << n for n in cluster) for cluster in FIELD_CLUSTERS]
+
+_EMPTY: Tuple = ()
+_PARALLEL_MIN_BOOKINGS = 30  # smaller types solve faster inline than a worker process starts
+_SCORE_CACHE_MAX = 50_000  # scoring states remembered per search before the cache is reset
+_BRANCH_AND_BOUND = True  # optimize: prune by penalty floor (off → exhaustive, same result)
 
 # -----------------------------------------------------------------------------
 # Data classes
 # -----------------------------------------------------------------------------
-@dataclass
+@dataclass(slots=True)
 class Booking:
     idx: int
     family: str
@@ -87,11 +72,34 @@ class Booking:
     check_in: str
     check_out: str
     forced_room: Optional[str]
+    ci_day: Optional[int] = None  # check_in/check_out as epoch days (None if unparseable)
+    co_day: Optional[int] = None
+    is_field: bool = field(init=False)  # שטח-style type, decided once
+
+    def __post_init__(self) -> None:
+        self.is_field = is_field_type(self.room_type)
 
-@dataclass
+@dataclass(slots=True)
 class Room:
     room: str
     room_type: str
+    num: Optional[int] = field(init=False)  # numeric part of the label, parsed once
+    area: Optional[int] = field(init=False)  # שטח area of that number
+
+    def __post_init__(self) -> None:
+        self.num = extract_room_number(self.room)
+        self.area = field_area_id(self.num)
+
+@dataclass(slots=True)
+class _Frame:
+    """One open node of the search: the booking branched on and its scored candidates."""
+    pos: int
+    booking: Booking
+    scored: List[Tuple[int, Tuple[Room, int]]]
+    pen: int
+    next: int = 0                             # index of the next candidate to try
+    tried: Optional[Tuple[Room, int]] = None  # candidate currently placed below this node
+    prev_last: Tuple = _EMPTY                 # family's last room before that placement
 
 # -----------------------------------------------------------------------------
 # Build שטח groups (family + type + identical date range)
@@ -99,7 +107,7 @@ class Room:
 def build_field_groups(bookings: List[Booking]) -> Dict[Tuple[str, str, str, str], Dict]:
     groups: Dict[Tuple[str, str, str, str], Dict] = {}
     for b in bookings:
-        if not is_field_type(b.room_type):
+        if not b.is_field:
             continue
         key = (b.family, b.room_type, b.check_in, b.check_out)
         if key not in groups:
@@ -112,53 +120,55 @@ def build_field_groups(bookings: List[Booking]) -> Dict[Tuple[str, str, str, str
         groups[key]["size"] += 1
 
     for key, meta in groups.items():
-        meta["target_set"] = field_target_set(meta["size"])
+        ts = field_target_set(meta["size"])
+        meta["target_set"] = ts
+        # number → first position in the target set, and the set's areas, for O(1) scoring
+        meta["target_index"] = {}
+        for i, n in enumerate(ts or ()):
+            meta["target_index"].setdefault(n, i)
+        meta["target_areas"] = {field_area_id(n) for n in ts if n is not None} if ts else None
     return groups
 
 # -----------------------------------------------------------------------------
-# Candidate scoring (soft constraints) — honors use_soft toggle
+# Candidate scoring (soft constraints; the search skips it when use_soft is off)
 # -----------------------------------------------------------------------------
-def score_candidate(
+def _soft_penalty(
     booking: Booking,
     room: Room,
-    family_serial_memory: Dict[str, List[str]],
+    last: Tuple,  # (number of the family's last room,) or () before its first placement
     groups: Dict[Tuple[str, str, str, str], Dict],
     waive_serial: bool,
     waive_forced: bool,
-    use_soft: bool,  # NEW: global toggle
-) -> Tuple[int, Tuple]:
+) -> int:
     """
-    Lower score is better. When use_soft=False, returns zero penalty (hard rules still enforced elsewhere).
+    Soft penalty of placing booking in room (lower is better). `last` holds the family's
+    previous room number; groups are build_field_groups' metadata with the search's state.
     """
-    # If soft constraints disabled → zero penalty, stable tiebreak by type/room
-    if not use_soft:
-        return (0, (str(room.room_type), str(room.room)))
-
     penalty = 0
-    tie: List = []
 
     # --- forced_room preference (soft bonus when matched, if not waived)
     if not waive_forced and booking.forced_room:
-        if str(room.room).strip() != str(booking.forced_room).strip():
+        if room.room != booking.forced_room:  # both stripped when built in assign_rooms
             penalty += 5
         else:
             penalty -= 10  # strong bonus
 
     # --- serial adjacency (soft)
     if not waive_serial:
-        last_rooms = family_serial_memory.get(booking.family, [])
-        if last_rooms:
-            if are_serial(last_rooms[-1], room.room):
+        if last:
+            # are_serial on the stored room numbers: both numeric and one apart
+            last_num = last[0]
+            if last_num is not None and room.num is not None and abs(last_num - room.num) == 1:
                 penalty -= 3
             else:
                 penalty += 1
 
     # --- שטח preferences & cluster rules (soft)
-    if is_field_type(booking.room_type):
+    if booking.is_field:
         key = (booking.family, booking.room_type, booking.check_in, booking.check_out)
         meta = groups.get(key)
-        num = extract_room_number(room.room)
-        area = field_area_id(num)
+        num = room.num
+        area = room.area
 
         # keep group in one area
         if meta and meta["size"] > 1 and meta["assigned_numbers"]:
@@ -166,17 +176,16 @@ def score_candidate(
             chosen = meta.get("chosen_area")
             if chosen is None and len(assigned_areas) == 1:
                 chosen = assigned_areas.pop()
-                meta["chosen_area"] = chosen
             if chosen is not None and area is not None:
                 penalty += (6 if area != chosen else -2)
 
         # target sets by group size
         if meta and meta["target_set"]:
-            if num in meta["target_set"]:
-                idx = meta["target_set"].index(num)
+            idx = meta["target_index"].get(num)
+            if idx is not None:
                 penalty -= (12 - idx)
             else:
-                ts_areas = {field_area_id(n) for n in meta["target_set"] if n is not None}
+                ts_areas = meta["target_areas"]
                 if len(ts_areas) == 1 and area is not None and next(iter(ts_areas)) == area:
                     penalty -= 1
 
@@ -188,16 +197,28 @@ def score_candidate(
                 penalty += 100
 
         # avoid splitting clusters
-        if meta:
-            assigned = meta["assigned_numbers"]
-            for cluster in FIELD_CLUSTERS:
-                if assigned & cluster:
-                    if (num in cluster and any(a not in cluster for a in assigned)) or (
-                        num not in cluster and assigned & cluster):
+        if meta and meta["assigned_numbers"]:
+            assigned_mask = meta.get("numbers_mask")  # kept by the search's place()/unplace()
+            if assigned_mask is None:
+                assigned_mask = sum(1 << n for n in meta["assigned_numbers"])
+            num_bit = 0 if num is None else 1 << num
+            for cm in FIELD_CLUSTER_MASKS:
+                if assigned_mask & cm:
+                    # joining the cluster while the group also sits outside it, or staying out of it
+                    if not (num_bit & cm) or assigned_mask & ~cm:
                         penalty += 30
 
-    tie.extend([str(room.room_type), str(room.room)])
-    return (penalty, tuple(tie))
+    return penalty
+
+# -----------------------------------------------------------------------------
+# Dates → int days (parsed once per solve)
+# -----------------------------------------------------------------------------
+def _epoch_days(values: List[str]) -> List[Optional[int]]:
+    """Batch-parse dd/mm/yyyy strings to days since epoch (None where unparseable)."""
+    ts = pd.to_datetime(pd.Series(values, dtype=object), format="%d/%m/%Y", errors="coerce", cache=True)
+    missing = ts.isna().to_numpy()
+    days = ts.to_numpy(dtype="datetime64[D]").astype("int64")
+    return [None if m else int(d) for d, m in zip(days, missing)]
 
 # -----------------------------------------------------------------------------
 # Search with budgets and best-so-far fallback
@@ -213,44 +234,109 @@ def _search_assignments(
     node_limit: int,
     log: Callable[[str], None],
     use_soft: bool,  # NEW
+    optimize: bool = False,
 ) -> Tuple[Dict[int, str], bool, int, bool]:
+    """
+    Budgeted DFS for one set of bookings → (map, complete, explored_nodes, timed_out).
+    Stops at the first complete map unless `optimize`, in which case it keeps looking for
+    complete maps with a lower soft penalty (branch and bound) until the tree or budget runs out.
+    """
     start = time.perf_counter()
     explored_nodes = 0
     timed_out = False
 
-    calendars: Dict[str, List[Tuple[pd.Timestamp, pd.Timestamp]]] = defaultdict(list)
-    family_serial_memory: Dict[str, List[str]] = defaultdict(list)
+    # Each family's last placed room number as a 1-tuple (() before its first placement);
+    # a placement saves the previous value on its frame and undo puts it back
+    family_of: Dict[str, int] = {}
+    family_pos = [family_of.setdefault(b.family, len(family_of)) for b in bookings]
+    family_last: List[Tuple] = [_EMPTY] * len(family_of)
 
-    bset = {(b.family, b.room_type, b.check_in, b.check_out) for b in bookings if is_field_type(b.room_type)}
+    bset = {(b.family, b.room_type, b.check_in, b.check_out) for b in bookings if b.is_field}
     field_groups = {k: dict(v) for k, v in field_groups_all.items() if k in bset}
     for meta in field_groups.values():
         meta["assigned_numbers"] = set()
+        meta["numbers_mask"] = 0  # assigned_numbers as a bitmask, kept in step for the score cache
         meta["chosen_area"] = None
+    # Each booking's שטח group (None for other types), looked up once instead of per placement
+    group_meta: List[Optional[Dict]] = [
+        field_groups.get((b.family, b.room_type, b.check_in, b.check_out)) if b.is_field else None
+        for b in bookings
+    ]
 
-    def parse_date(s: str) -> pd.Timestamp:
-        return pd.to_datetime(s, format="%d/%m/%Y", errors="coerce")
-
-    intervals: Dict[int, Tuple[pd.Timestamp, pd.Timestamp]] = {
-        b.idx: (parse_date(b.check_in), parse_date(b.check_out)) for b in bookings
-    }
-
-    rooms_by_type: Dict[str, List[Room]] = defaultdict(list)
+    # Rooms are interned to int ids by label (one calendar per label) for the hot loop
+    room_ids: Dict[str, int] = {}
+    rooms_by_type: Dict[str, List[Tuple[Room, int]]] = defaultdict(list)
+    rooms_by_label: Dict[Tuple[str, str], List[Tuple[Room, int]]] = defaultdict(list)
     for rm in rooms:
-        rooms_by_type[rm.room_type].append(rm)
-
-    best_map: Dict[int, str] = {}
+        rid = room_ids.setdefault(rm.room, len(room_ids))
+        rooms_by_type[rm.room_type].append((rm, rid))
+        rooms_by_label[(rm.room_type, rm.room)].append((rm, rid))
+    calendars: List[List[Tuple[int, int]]] = [[] for _ in room_ids]
+    last_of_room: List[Tuple] = [_EMPTY] * len(room_ids)  # family_last value after using the room
+    for rm, rid in (c for cands in rooms_by_type.values() for c in cands):
+        last_of_room[rid] = (rm.num,)
+
+    # Stays as day bitmasks over this search's horizon (bit d ⇔ day h0 + d): a room's
+    # occupancy is one int, so a feasibility test is a single AND. A stay with
+    # check_out <= check_in has no bits, so if the type has any, the interval scan is kept.
+    days = [(b.ci_day, b.co_day) for b in bookings]
+    use_bits = all(ci is None or co is None or ci < co for ci, co in days)
+    h0 = min((ci for ci, co in days if ci is not None and co is not None), default=0)
+    stay_bits = [
+        0 if ci is None or co is None else ((1 << (co - ci)) - 1) << (ci - h0)
+        for ci, co in days
+    ] if use_bits else []
+    occupied: List[int] = [0] * len(room_ids)
+
+    best_count = 0
     best_penalty = float("inf")
 
     # Forced-room bookings first
     forced_pos = [i for i, b in enumerate(bookings) if b.forced_room]
     nonforced = [i for i, b in enumerate(bookings) if not b.forced_room]
     depth_order = forced_pos + nonforced
+    n_bookings = len(depth_order)
 
-    def feasible(b: Booking, rm: Room) -> bool:
-        ci, co = intervals[b.idx]
-        if pd.isna(ci) or pd.isna(co):
+    # Static candidates per booking (same type; HARD-enforced forced_room), hoisted out of the search
+    static_candidates: List[Tuple[Tuple[Room, int], ...]] = []
+    for b in bookings:
+        if b.forced_room:
+            static_candidates.append(tuple(rooms_by_label.get((b.room_type, b.forced_room), _EMPTY)))
+        else:
+            static_candidates.append(tuple(rooms_by_type.get(b.room_type, _EMPTY)))
+
+    # Domain sizes kept up to date as rooms fill (bitmap path only): remaining[pos] counts the
+    # booking's candidates that are still free; placing a stay in a room only touches the
+    # bookings listed for that room (one entry per candidate occurrence).
+    remaining: List[int] = []
+    room_users: List[List[Tuple[int, int]]] = [[] for _ in room_ids]
+    if use_bits:
+        for pos, cands in enumerate(static_candidates):
+            bits = stay_bits[pos]
+            remaining.append(len(cands) if bits else 0)
+            if bits:
+                for _, rid in cands:
+                    room_users[rid].append((pos, bits))
+
+    score_cache: Dict[Tuple, Dict[int, int]] = {}
+
+    # Interchangeable rooms: when scoring can't tell rooms apart (no serial/שטח rules in
+    # play) and no forced_room names them, two rooms offered to the same room types with the
+    # same occupancy lead to mirror-image subtrees, so a node tries only the first of them.
+    # Every other room is its own class.
+    rid_types: List[set] = [set() for _ in room_ids]
+    for rm, rid in (c for cands in rooms_by_type.values() for c in cands):
+        rid_types[rid].add(rm.room_type)
+    forced_rids = {rid for b, cands in zip(bookings, static_candidates) if b.forced_room for _, rid in cands}
+    room_class: List[object] = []
+    for rid, types in enumerate(rid_types):
+        numbered = use_soft and (not waive_serial or any(is_field_type(t) for t in types))
+        room_class.append(rid if numbered or rid in forced_rids else frozenset(types))
+
+    def feasible(ci: Optional[int], co: Optional[int], rid: int) -> bool:
+        if ci is None or co is None:
             return False
-        for (eci, eco) in calendars[rm.room]:
+        for (eci, eco) in calendars[rid]:
             if ci < eco and eci < co:  # overlap
                 return False
         return True
@@ -262,105 +348,393 @@ def _search_assignments(
             return True
         return False
 
-    def backtrack(depth: int, current_map: Dict[int, str], current_pen: int) -> Optional[Dict[int, str]]:
-        nonlocal explored_nodes, best_map, best_penalty
+    # Room label per booking position (None = unplaced), so a best-so-far snapshot is a list copy
+    assignment: List[Optional[str]] = [None] * n_bookings
+    n_assigned = 0
+    best_assignment: List[Optional[str]] = [None] * n_bookings  # overwritten in place
+
+    def expand(current_pen: int):
+        """
+        Open a search node for the current partial map: True when it is complete, None when the
+        budget ran out or no booking is left to branch on, else the node's frame.
+        """
+        nonlocal explored_nodes, best_count, best_penalty
 
         if now_exceeded():
             return None
 
         # Best-so-far update
-        if len(current_map) > len(best_map) or (len(current_map) == len(best_map) and current_pen < best_penalty):
-            best_map = dict(current_map)
+        if n_assigned > best_count or (n_assigned == best_count and current_pen < best_penalty):
+            best_assignment[:] = assignment  # same length → C copy into the existing buffer
+            best_count = n_assigned
             best_penalty = current_pen
 
-        if depth == len(depth_order):
-            return dict(current_map)
-
-        candidates_per_bid: Dict[int, List[Room]] = {}
-        mrv_list: List[Tuple[int, int, int]] = []
-
-        # Generate feasible candidates, HARD-enforcing forced_room
-        for pos in depth_order:
+        if n_assigned == n_bookings:
+            return None if optimize else True  # optimizing: recorded above, keep searching
+
+        if use_bits:
+            # MRV straight from the maintained counts (ties → lowest position, so scanning in
+            # position order can stop at the first wiped-out domain); only the pick is filtered
+            pick = None
+            for pos in range(n_bookings):
+                if assignment[pos] is None:
+                    r = remaining[pos]
+                    if pick is None or r < pick[0]:
+                        pick = (r, pos)
+                        if r == 0:
+                            break
+            explored_nodes += 1
+            if pick is None or pick[0] == 0:
+                return None  # forward check: some unplaced booking has no free room left
+            pos = pick[1]
+            b = bookings[pos]
+            bits = stay_bits[pos]
+            feas = [c for c in static_candidates[pos] if not occupied[c[1]] & bits] if bits else []
+        else:
+            candidates_per_bid: Dict[int, List[Tuple[Room, int]]] = {}
+            mrv_list: List[Tuple[int, int, int]] = []
+
+            # Generate feasible candidates (forced_room already applied in static_candidates)
+            for pos in depth_order:
+                if assignment[pos] is not None:
+                    continue
+                b = bookings[pos]
+                bid = b.idx
+                feas = [c for c in static_candidates[pos] if feasible(b.ci_day, b.co_day, c[1])]
+                candidates_per_bid[bid] = feas
+                mrv_list.append((len(feas), pos, bid))
+
+            explored_nodes += 1
+            if not mrv_list:
+                return None
+
+            mrv_list.sort()
+            _, pos, bid = mrv_list[0]
             b = bookings[pos]
-            bid = b.idx
-            if bid in current_map:
+            feas = candidates_per_bid[bid]
+
+        # Value ordering (soft penalties can be disabled via use_soft)
+        # (the score is kept with the room: it is the placement's penalty when it is tried)
+        if use_soft:
+            # A penalty depends on the room, the family's last room (serial rule) and the
+            # booking's שטח group state, so backtracking to the same state reuses the scores
+            last = family_last[family_pos[pos]]
+            meta = group_meta[pos]
+            state = (meta["numbers_mask"], meta["chosen_area"]) if meta is not None else None
+            key = (pos, _EMPTY if waive_serial else last, state)
+            known = score_cache.get(key)
+            if known is None:
+                if len(score_cache) >= _SCORE_CACHE_MAX:
+                    score_cache.clear()
+                known = score_cache[key] = {}
+            scored: List[Tuple[int, Tuple[Room, int]]] = []
+            for cand in feas:
+                sc_pen = known.get(cand[1])
+                if sc_pen is None:
+                    sc_pen = known[cand[1]] = _soft_penalty(
+                        b, cand[0], last, field_groups, waive_serial, waive_forced
+                    )
+                scored.append((sc_pen, cand))
+            scored.sort(key=lambda x: x[0])
+        else:
+            scored = [(0, cand) for cand in feas]  # all ties → catalog order
+        if use_bits and len(scored) > 1:
+            seen = set()
+            distinct = []
+            for item in scored:
+                rid = item[1][1]
+                cls = room_class[rid]
+                sym = (rid,) if type(cls) is int else (item[0], occupied[rid], cls)
+                if sym not in seen:
+                    seen.add(sym)
+                    distinct.append(item)
+            scored = distinct
+        return _Frame(pos=pos, booking=b, scored=scored, pen=current_pen)
+
+    def place(fr: _Frame, rm: Room, rid: int) -> None:
+        nonlocal n_assigned, floor_left
+        b = fr.booking
+        assignment[fr.pos] = rm.room
+        n_assigned += 1
+        floor_left -= penalty_floor[fr.pos]
+        if use_bits:
+            bits = stay_bits[fr.pos]
+            occ = occupied[rid]
+            for pos2, bits2 in room_users[rid]:
+                if bits2 & bits and not occ & bits2:
+                    remaining[pos2] -= 1
+            occupied[rid] = occ | bits
+        else:
+            calendars[rid].append((b.ci_day, b.co_day))
+        fid = family_pos[fr.pos]
+        fr.prev_last = family_last[fid]
+        family_last[fid] = last_of_room[rid]
+
+        # update שטח group meta to influence next picks
+        meta = group_meta[fr.pos]
+        if meta is not None:
+            num = rm.num
+            if num is not None:
+                meta["assigned_numbers"].add(num)
+                meta["numbers_mask"] |= 1 << num
+                if meta.get("chosen_area") is None:
+                    meta["chosen_area"] = rm.area
+
+    def unplace(fr: _Frame, rm: Room, rid: int) -> None:
+        nonlocal n_assigned, floor_left
+        b = fr.booking
+        floor_left += penalty_floor[fr.pos]
+        if use_bits:
+            bits = stay_bits[fr.pos]
+            occupied[rid] = occ = occupied[rid] ^ bits  # the stay's bits were all clear before
+            for pos2, bits2 in room_users[rid]:
+                if bits2 & bits and not occ & bits2:
+                    remaining[pos2] += 1
+        else:
+            calendars[rid].pop()
+        family_last[family_pos[fr.pos]] = fr.prev_last
+        meta = group_meta[fr.pos]
+        if meta is not None:
+            num = rm.num
+            if num is not None and num in meta["assigned_numbers"]:
+                meta["assigned_numbers"].remove(num)
+                meta["numbers_mask"] &= ~(1 << num)
+
+        assignment[fr.pos] = None
+        n_assigned -= 1
+
+    # Branch and bound (optimize only): once a complete map is known, a placement is tried
+    # only if its penalty so far plus the lowest penalty the unplaced rows could still add
+    # beats it. A row's floor sums the best case of each soft rule that applies to it.
+    penalty_floor = [0] * n_bookings
+    if optimize and use_soft:
+        for pos, b in enumerate(bookings):
+            floor = -10 if b.forced_room and not waive_forced else 0
+            if not waive_serial:
+                floor -= 3
+            meta = group_meta[pos]
+            if meta is not None:
+                floor -= 2 + (12 if meta["target_set"] else 0)
+            penalty_floor[pos] = floor
+    floor_left = sum(penalty_floor)  # over the unplaced rows
+    prune = optimize and _BRANCH_AND_BOUND
+
+    # Depth-first search on an explicit stack of open nodes (no Python recursion): the top
+    # frame tries its candidates in order; a failed child is undone before the next one.
+    root = expand(0)
+    stack: List[_Frame] = []
+    if root is not None and root is not True:
+        stack.append(root)
+    while stack:
+        fr = stack[-1]
+        if fr.tried is not None:
+            unplace(fr, *fr.tried)
+            fr.tried = None
+            if now_exceeded():
+                stack.pop()
                 continue
+        if fr.next == len(fr.scored):
+            stack.pop()
+            continue
+        sc_pen, (rm, rid) = fr.scored[fr.next]
+        if (prune and best_count == n_bookings
+                and fr.pen + sc_pen + floor_left - penalty_floor[fr.pos] >= best_penalty):
+            stack.pop()  # candidates are sorted by penalty: the rest can't do better either
+            continue
+        fr.next += 1
+        place(fr, rm, rid)
+        fr.tried = (rm, rid)
+        child = expand(fr.pen + sc_pen)
+        if child is True:
+            break
+        if child is not None:
+            stack.append(child)
 
-            feas = [rm for rm in rooms_by_type.get(b.room_type, []) if feasible(b, rm)]
-            if b.forced_room:
-                feas = [rm for rm in feas if str(rm.room).strip() == str(b.forced_room).strip()]
+    # The best-so-far is the first complete map (or, optimizing, the cheapest one found)
+    complete = best_count == n_bookings
+    found = {b.idx: room for b, room in zip(bookings, best_assignment) if room is not None}
+    return found, complete, explored_nodes, timed_out
 
-            candidates_per_bid[bid] = feas
-            mrv_list.append((len(feas), pos, bid))
 
-        explored_nodes += 1
-        if not mrv_list:
-            return dict(current_map)
+# -----------------------------------------------------------------------------
+# CP-SAT completion (hard constraints only) for types the search leaves partial
+# -----------------------------------------------------------------------------
+def _cp_sat_assign(
+    bookings: List[Booking],
+    rooms: List[Room],
+    hint: Dict[int, str],
+    time_limit_sec: float,
+) -> Optional[Dict[int, str]]:
+    """
+    Place as many bookings as possible: one optional fixed interval per (booking, candidate
+    room) and a NoOverlap per room. Ties go to keeping the search's rooms (`hint`), so its
+    soft-constraint choices survive wherever they fit. None if OR-Tools is missing, a stay
+    can't be modelled (check_out <= check_in) or no solution is found in time.
+    """
+    if cp_model is None:
+        return None
+    rooms_by_type: Dict[str, List[str]] = defaultdict(list)
+    for rm in rooms:
+        if rm.room not in rooms_by_type[rm.room_type]:
+            rooms_by_type[rm.room_type].append(rm.room)
 
-        mrv_list.sort()
-        _, pos, bid = mrv_list[0]
-        b = bookings[pos]
-        feas = candidates_per_bid[bid]
+    model = cp_model.CpModel()
+    x: Dict[Tuple[int, str], cp_model.IntVar] = {}
+    per_room: Dict[str, List] = defaultdict(list)
+    for b in bookings:
+        ci, co = b.ci_day, b.co_day
+        if ci is None or co is None:
+            continue  # unparseable dates never fit
+        if co <= ci:
+            return None
+        labels = rooms_by_type.get(b.room_type, [])
+        if b.forced_room:  # forced_room stays HARD
+            labels = [r for r in labels if r == b.forced_room]
+        for r in labels:
+            v = model.NewBoolVar(f"x_{b.idx}_{r}")
+            x[(b.idx, r)] = v
+            per_room[r].append(model.NewOptionalFixedSizeIntervalVar(ci, co - ci, v, f"s_{b.idx}_{r}"))
+        model.AddAtMostOne(x[(b.idx, r)] for r in labels)
+    for ivs in per_room.values():
+        model.AddNoOverlap(ivs)
+
+    # Assigned count dominates; keeping a hinted room only breaks ties (one term per variable)
+    weight = len(bookings) + 1
+    hinted = [hint.get(bid) == r for bid, r in x]
+    model.Maximize(cp_model.LinearExpr.WeightedSum(list(x.values()), [weight + h for h in hinted]))
+    for v, h in zip(x.values(), hinted):
+        model.AddHint(v, h)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = float(time_limit_sec)
+    solver.parameters.num_workers = 1  # room types already run in parallel; keeps results reproducible
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    return {bid: r for (bid, r), v in x.items() if solver.Value(v)}
 
-        # Value ordering (soft penalties can be disabled via use_soft)
-        scored: List[Tuple[Tuple[int], Room]] = []
-        for rm in feas:
-            sc_pen, _ = score_candidate(
-                b, rm, family_serial_memory, field_groups, waive_serial, waive_forced, use_soft
-            )
-            scored.append(((sc_pen,), rm))
-        scored.sort(key=lambda x: x[0])
-        ordered_rooms = [rm for _, rm in scored]
-
-        for rm in ordered_rooms:
-            # assign
-            current_map[bid] = rm.room
-            ci, co = intervals[bid]
-            calendars[rm.room].append((ci, co))
-            family_serial_memory[b.family].append(rm.room)
-
-            # update שטח group meta to influence next picks
-            if is_field_type(b.room_type):
-                key = (b.family, b.room_type, b.check_in, b.check_out)
-                meta = field_groups.get(key)
-                if meta is not None:
-                    num = extract_room_number(rm.room)
-                    if num is not None:
-                        meta["assigned_numbers"].add(num)
-                        if meta.get("chosen_area") is None:
-                            meta["chosen_area"] = field_area_id(num)
-
-            res = backtrack(
-                depth + 1,
-                current_map,
-                current_pen + score_candidate(
-                    b, rm, family_serial_memory, field_groups, waive_serial, waive_forced, use_soft
-                )[0],
-            )
-            if res is not None and len(res) == len(bookings):
-                return res  # complete
-
-            # undo
-            calendars[rm.room].pop()
-            family_serial_memory[b.family].pop()
-            if is_field_type(b.room_type):
-                key = (b.family, b.room_type, b.check_in, b.check_out)
-                meta = field_groups.get(key)
-                if meta is not None:
-                    num = extract_room_number(rm.room)
-                    if num is not None and num in meta["assigned_numbers"]:
-                        meta["assigned_numbers"].remove(num)
-
-            del current_map[bid]
 
-            if now_exceeded():
-                break
+# -----------------------------------------------------------------------------
+# One room_type: relaxation ladder (module-level so worker processes can run it)
+# -----------------------------------------------------------------------------
+def _solve_type(
+    rt: str,
+    bk: List[Booking],
+    rms: List[Room],
+    t_per: float,
+    n_per: int,
+    use_soft: bool,
+    log: Optional[Callable[[str], None]] = None,
+    optimize: bool = False,
+) -> Tuple[Dict[int, str], List[str]]:
+    """
+    Run the relaxation ladder for a single room_type.
+    Returns (best_map, log_lines); log_lines is only filled when no log callback is given
+    (i.e. in a worker process), so the caller can replay it in order.
+    """
+    lines: List[str] = []
+    if log is None:
+        log = lines.append
+    start = time.perf_counter()
 
-        return None
+    # Build שטח groups for these bookings only (function filters internally)
+    field_groups = build_field_groups(bk)
+
+    # Relaxation ladder per type
+    if use_soft:
+        modes = [(True, False), (False, False), (True, True)]
+    else:
+        # No soft prefs → single pass (forced still hard in candidate gen)
+        modes = [(True, True)]
+
+    best_map: Dict[int, str] = {}
+    best_complete = False
+    # forced_room is hard, so every candidate of a forced booking gets the same forced
+    # bonus: waive_forced never reorders values and the rung explores the same tree as an
+    # earlier one with the same waive_serial. Only a run cut by the clock is worth redoing.
+    settled_serial = set()
+    for waive_serial, waive_forced in modes:
+        if waive_serial in settled_serial:
+            log(f"[{rt}] Skip search (waive_serial={waive_serial}, waive_forced={waive_forced}): "
+                f"same search tree as an earlier pass")
+            continue
+        log(f"[{rt}] Start search (use_soft={use_soft}, waive_serial={waive_serial}, waive_forced={waive_forced}) "
+            f"budget={t_per:.1f}s/{n_per} nodes")
+        found_map, complete, explored, timed_out = _search_assignments(
+            bk, rms, field_groups,
+            waive_serial=waive_serial,
+            waive_forced=waive_forced,
+            time_limit_sec=t_per,
+            node_limit=n_per,
+            log=log,
+            use_soft=use_soft,
+            optimize=optimize,
+        )
+        log(f"[{rt}] explored={explored} nodes; timed_out={timed_out}; "
+            f"assigned={len(found_map)}/{len(bk)}; complete={complete}")
+        if len(found_map) > len(best_map):
+            best_map = found_map
+            best_complete = complete
+        if complete:
+            if optimize and use_soft and waive_serial:
+                # The rung that completed waived the serial rule, so its optimum ignores serial
+                # adjacency: optimize once more with it and keep that map if it is complete
+                log(f"[{rt}] Start optimizing search (waive_serial=False, waive_forced={waive_forced}) "
+                    f"budget={t_per:.1f}s/{n_per} nodes")
+                serial_map, serial_complete, explored, timed_out = _search_assignments(
+                    bk, rms, field_groups,
+                    waive_serial=False,
+                    waive_forced=waive_forced,
+                    time_limit_sec=t_per,
+                    node_limit=n_per,
+                    log=log,
+                    use_soft=use_soft,
+                    optimize=True,
+                )
+                log(f"[{rt}] explored={explored} nodes; timed_out={timed_out}; "
+                    f"assigned={len(serial_map)}/{len(bk)}; complete={serial_complete}")
+                if serial_complete:
+                    best_map = serial_map
+            break
+        if not timed_out or explored >= n_per:
+            settled_serial.add(waive_serial)
+
+    # Search left the type partial → let CP-SAT try to place more under the hard rules, on
+    # whatever is left of the type's time budget. Rows it could never place (bad dates, no
+    # room of theirs in the catalog) are left out; if those are all that is missing, or the
+    # search placed a check_out <= check_in row CP-SAT can't model, the search result stands.
+    if not best_complete and cp_model is not None:
+        types = {rm.room_type for rm in rms}
+        labels = {(rm.room_type, rm.room) for rm in rms}
+        modelable = [
+            b for b in bk
+            if b.ci_day is not None and b.co_day is not None and b.co_day > b.ci_day
+            and ((b.room_type, b.forced_room) in labels if b.forced_room else b.room_type in types)
+        ]
+        keeps_odd_stay = any(b.idx in best_map and b.co_day <= b.ci_day for b in bk
+                             if b.ci_day is not None and b.co_day is not None)
+        left = t_per - (time.perf_counter() - start)
+        if keeps_odd_stay or all(b.idx in best_map for b in modelable):
+            pass
+        elif left <= 0:
+            log(f"[{rt}] CP-SAT completion skipped: time budget used up by the search")
+        else:
+            cp_map = _cp_sat_assign(modelable, rms, best_map, left)
+            if cp_map is not None and len(cp_map) > len(best_map):
+                log(f"[{rt}] CP-SAT completion: assigned={len(cp_map)}/{len(bk)} (search had {len(best_map)})")
+                best_map = cp_map
+
+    return best_map, lines
 
-    full = backtrack(0, {}, 0)
-    complete = full is not None and len(full) == len(bookings)
-    return (full or best_map), complete, explored_nodes, timed_out
+
+def _text_col(df: pd.DataFrame, name: str) -> List[str]:
+    """
+    Column as stripped, interned strings ("" for every row if the column is missing): equal
+    labels share one object, so the search's dict lookups and == checks hit identity first.
+    """
+    if name not in df.columns:
+        return [""] * len(df)
+    return [sys.intern(v) for v in df[name].astype(object).map(str).str.strip().tolist()]
 
 
 # -----------------------------------------------------------------------------
@@ -375,6 +749,8 @@ def assign_rooms(
     node_limit: int = 500_000,
     solve_per_type: bool = True,
     use_soft: bool = True,  # NEW: toggle soft constraints (default ON)
+    max_workers: Optional[int] = None,
+    optimize: bool = False,
 ) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Backtracking solver with MRV + value ordering.
@@ -383,6 +759,12 @@ def assign_rooms(
     - Soft constraints (serial adjacency, שטח/mixed-type prefs) can be turned off via use_soft=False.
     - Per-type solving (default) to reduce search space.
     - Time/node budgets per type with best-so-far fallback.
+    - Room types with at least _PARALLEL_MIN_BOOKINGS rows are solved in parallel worker
+      processes when there are two or more of them (max_workers=1 → sequential).
+    - optimize=True keeps searching after the first complete map of a type for one with a
+      lower soft penalty (branch and bound), using the rest of the type's budget; if that
+      map came from a rung that waives the serial rule, a second optimizing pass scores
+      serial adjacency too and its map is kept when complete.
     """
     log = (lambda m: None) if log_func is None else log_func
 
@@ -397,24 +779,32 @@ def assign_rooms(
     if "forced_room" not in fam.columns:
         fam["forced_room"] = ""
 
-    # Build bookings
+    # Build bookings: each column cleaned once (str + strip), then zipped row-wise
+    cols = [_text_col(fam, c) for c in ("family", "room_type", "check_in", "check_out", "forced_room")]
     bookings: List[Booking] = []
-    for i, r in fam.iterrows():
+    for i, family, room_type, check_in, check_out, forced_room in zip(fam.index, *cols):
         bookings.append(
             Booking(
                 idx=int(i),
-                family=str(r.get("family", "")).strip(),
-                room_type=str(r.get("room_type", "")).strip(),
-                check_in=str(r.get("check_in", "")).strip(),
-                check_out=str(r.get("check_out", "")).strip(),
-                forced_room=(str(r.get("forced_room", "")).strip() or None),
+                family=family,
+                room_type=room_type,
+                check_in=check_in,
+                check_out=check_out,
+                forced_room=(forced_room or None),
             )
         )
 
+    # Stay dates as int days (None if unparseable), parsed in one vectorized pass
+    ci_days = _epoch_days([b.check_in for b in bookings])
+    co_days = _epoch_days([b.check_out for b in bookings])
+    for b, ci, co in zip(bookings, ci_days, co_days):
+        b.ci_day, b.co_day = ci, co
+
     # Rooms catalog
+    rms = rooms_df.fillna("")
     rooms_list = [
-        Room(room=str(r.get("room", "")).strip(), room_type=str(r.get("room_type", "")).strip())
-        for _, r in rooms_df.fillna("").iterrows()
+        Room(room=room, room_type=room_type)
+        for room, room_type in zip(_text_col(rms, "room"), _text_col(rms, "room_type"))
     ]
     rooms_by_type: Dict[str, List[Room]] = defaultdict(list)
     for rm in rooms_list:
@@ -439,10 +829,34 @@ def assign_rooms(
     t_per = max(time_limit_sec / max(1, len(rt_list)), 3.0)  # minimum 3s per type
     n_per = max(node_limit // max(1, len(rt_list)), 20_000)
 
+    def type_inputs(rt: str) -> Tuple[List[Booking], List[Room]]:
+        return per_type_bookings.get(rt, []), per_type_rooms.get(rt, [])
+
+    # Room types share no rooms, so their searches are independent → solve the big ones in
+    # parallel; a pool is only worth its start-up when at least two types need real work
+    tasks = [
+        rt for rt in rt_list
+        if all(type_inputs(rt)) and len(per_type_bookings[rt]) >= _PARALLEL_MIN_BOOKINGS
+    ]
+    workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+    solved: Dict[str, Tuple[Dict[int, str], List[str]]] = {}
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                futures = {
+                    rt: ex.submit(_solve_type, rt, *type_inputs(rt), t_per, n_per, use_soft, optimize=optimize)
+                    for rt in tasks
+                }
+                solved = {rt: f.result() for rt, f in futures.items()}
+        except (BrokenProcessPool, OSError, PicklingError) as e:
+            # the pool itself failed (no fork/spawn, dead worker, unpicklable input); errors
+            # raised by _solve_type propagate
+            log(f"Parallel solve unavailable ({e!r}); solving room types sequentially.")
+            solved = {}
+
     global_assigned: Dict[int, str] = {}
     for rt in rt_list:
-        bk = per_type_bookings.get(rt, [])
-        rms = per_type_rooms.get(rt, [])
+        bk, rms = type_inputs(rt)
 
         if not bk:
             continue
@@ -450,67 +864,47 @@ def assign_rooms(
             log(f"[{rt}] No rooms available for this type.")
             continue
 
-        # Build שטח groups for these bookings only (function filters internally)
-        field_groups = build_field_groups(bk)
-
-        # Relaxation ladder per type
-        if use_soft:
-            modes = [(True, False), (False, False), (True, True)]
+        if rt in solved:
+            best_map, lines = solved[rt]
+            for line in lines:  # replay worker log in type order
+                log(line)
         else:
-            # No soft prefs → single pass (forced still hard in candidate gen)
-            modes = [(True, True)]
-
-        best_map: Dict[int, str] = {}
-        best_complete = False
-        for waive_serial, waive_forced in modes:
-            log(f"[{rt}] Start search (use_soft={use_soft}, waive_serial={waive_serial}, waive_forced={waive_forced}) "
-                f"budget={t_per:.1f}s/{n_per} nodes")
-            found_map, complete, explored, timed_out = _search_assignments(
-                bk, rms, field_groups,
-                waive_serial=waive_serial,
-                waive_forced=waive_forced,
-                time_limit_sec=t_per,
-                node_limit=n_per,
-                log=log,
-                use_soft=use_soft,
-            )
-            log(f"[{rt}] explored={explored} nodes; timed_out={timed_out}; "
-                f"assigned={len(found_map)}/{len(bk)}; complete={complete}")
-            if len(found_map) > len(best_map):
-                best_map = found_map
-                best_complete = complete
-            if complete:
-                break
+            best_map, _ = _solve_type(rt, bk, rms, t_per, n_per, use_soft, log=log, optimize=optimize)
 
         global_assigned.update(best_map)
 
-    # Build outputs with legacy columns
-    assigned_rows, unassigned_rows = [], []
+    # Build outputs with legacy columns, column-wise (no per-row dicts)
+    def to_frame(bks: List[Booking], rooms_col: List[str]) -> pd.DataFrame:
+        if not bks:
+            return pd.DataFrame()
+        ids = [b.idx for b in bks]
+        return pd.DataFrame({
+            "_idx": ids,         # legacy
+            "id": ids,           # extra compatibility
+            "family": [b.family for b in bks],
+            "room_type": [b.room_type for b in bks],
+            "check_in": [b.check_in for b in bks],
+            "check_out": [b.check_out for b in bks],
+            "forced_room": [b.forced_room or "" for b in bks],
+            "room": rooms_col,
+        })
+
+    assigned_bk: List[Booking] = []
+    assigned_room: List[str] = []
+    unassigned_bk: List[Booking] = []
     for b in bookings:
-        base = {
-            "_idx": b.idx,       # legacy
-            "id": b.idx,         # extra compatibility
-            "family": b.family,
-            "room_type": b.room_type,
-            "check_in": b.check_in,
-            "check_out": b.check_out,
-            "forced_room": b.forced_room or "",
-        }
         room_assigned = global_assigned.get(b.idx, "")
         if room_assigned:
-            row = dict(base)
-            row["room"] = room_assigned
-            assigned_rows.append(row)
+            assigned_bk.append(b)
+            assigned_room.append(room_assigned)
         else:
-            row = dict(base)
-            row["room"] = ""
-            unassigned_rows.append(row)
+            unassigned_bk.append(b)
 
-    return pd.DataFrame(assigned_rows), pd.DataFrame(unassigned_rows)
+    return to_frame(assigned_bk, assigned_room), to_frame(unassigned_bk, [""] * len(unassigned_bk))
 
 
 # -----------------------------------------------------------------------------
-# Back-compat wrapper for older code paths (core.py still calls this)
+# Back-compat wrapper for older code paths expecting three return values
 # -----------------------------------------------------------------------------
 def assign_per_type(families_arg, rooms_arg, *args, **kwargs):
     """
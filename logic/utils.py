@@ -1,18 +1,32 @@
 from __future__ import annotations
 import re
-from datetime import datetime as dt
+from datetime import date, datetime as dt
+from functools import lru_cache
 
 DATE_FMT = "%d/%m/%Y"
 
+@lru_cache(maxsize=4096)
 def _parse_date(s: str) -> dt:
+    # datetimes are immutable, so cached results are safe to share between callers
     return dt.strptime(str(s).strip(), DATE_FMT)
 
+@lru_cache(maxsize=4096)
+def _parse_day(s: str) -> int:
+    """Day ordinal of a date string; cached since the same dates repeat across rows."""
+    t = str(s).strip()
+    # Fast path for the canonical zero-padded dd/mm/yyyy; anything else goes through strptime
+    if len(t) == 10 and t[2] == t[5] == "/" and t.isascii() and (t[:2] + t[3:5] + t[6:]).isdigit():
+        return date(int(t[6:]), int(t[3:5]), int(t[:2])).toordinal()
+    return _parse_date(t).toordinal()
+
+_NUM_RE = re.compile(r"\d+")  # first run of digits in a room label
+
 def _norm_room(x) -> str:
     return str(x).strip()
 
 def _room_sort_key(r: str):
     s = _norm_room(r)
-    m = re.search(r"\d+", s)
+    m = _NUM_RE.search(s)
     return (int(m.group()) if m else float("inf"), s)
 
 def _overlaps(a_start: dt, a_end: dt, b_start: dt, b_end: dt) -> bool:
@@ -26,22 +40,23 @@ def _clean_opt(v) -> str:
     return "" if s.lower() in {"", "nan", "none", "null"} else s
 
 def are_serial(r1: str, r2: str) -> bool:
-    n1 = re.findall(r"\d+", _norm_room(r1))
-    n2 = re.findall(r"\d+", _norm_room(r2))
-    if n1 and n2:
-        return abs(int(n1[0]) - int(n2[0])) == 1
-    return False
+    # Numeric parts come from the cached extract_room_number (first run of digits, as before)
+    n1 = extract_room_number(_norm_room(r1))
+    n2 = extract_room_number(_norm_room(r2))
+    return n1 is not None and n2 is not None and abs(n1 - n2) == 1
 
+@lru_cache(maxsize=4096)
 def is_field_type(room_type: str) -> bool:
     s = (room_type or "").strip().lower()
     return "שטח" in s or "field" in s or "camp" in s or "pitch" in s
 
+@lru_cache(maxsize=4096)
 def extract_room_number(room: str) -> int | None:
     """Return the integer part of a room label (e.g., 'שטח 12' -> 12)."""
     if room is None:
         return None
-    m = re.search(r"(\d+)", str(room))
-    return int(m.group(1)) if m else None
+    m = _NUM_RE.search(str(room))
+    return int(m.group()) if m else None
 
 def field_area_id(num: int | None) -> int | None:
     """Area 1 = 1..5, Area 2 = 6..18; else None."""
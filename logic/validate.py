@@ -1,8 +1,9 @@
 from __future__ import annotations
-from typing import List, Tuple
+from typing import Dict, List, Tuple
+import numpy as np
 import pandas as pd
 
-from .utils import _parse_date, _overlaps, _room_sort_key, are_serial
+from .utils import _parse_day, extract_room_number
 
 def validate_constraints(assigned_df: pd.DataFrame):
     """
@@ -17,43 +18,49 @@ def validate_constraints(assigned_df: pd.DataFrame):
     df["room"] = df["room"].astype(str).str.strip()
     df["room_type"] = df["room_type"].astype(str).str.strip()
 
-    # Hard: no overlaps per (room_type, room)
+    # Hard: no overlaps per (room_type, room) — one sort, then compare each stay with the
+    # previous one in the same room (an unparseable date is a hard failure too)
     hard_ok = True
-    for (rt, r), grp in df.groupby(["room_type", "room"]):
-        intervals = []
-        for _, row in grp.iterrows():
-            try:
-                start = _parse_date(row["check_in"])
-                end = _parse_date(row["check_out"])
-            except Exception:
-                hard_ok = False
-                break
-            intervals.append((start, end))
-        if not hard_ok:
-            break
-        intervals.sort()
-        for i in range(1, len(intervals)):
-            if _overlaps(intervals[i - 1][0], intervals[i - 1][1], intervals[i][0], intervals[i][1]):
-                hard_ok = False
-                break
-        if not hard_ok:
-            break
+    try:
+        starts = np.array([_parse_day(v) for v in df["check_in"]], dtype=np.int64)
+        ends = np.array([_parse_day(v) for v in df["check_out"]], dtype=np.int64)
+    except Exception:
+        hard_ok = False
+    else:
+        srt = pd.DataFrame({
+            "room_type": df["room_type"].to_numpy(), "room": df["room"].to_numpy(),
+            "start": starts, "end": ends,
+        }).sort_values(["room_type", "room", "start", "end"])
+        rt_a, room_a, s, e = (srt[c].to_numpy() for c in ("room_type", "room", "start", "end"))
+        same_room = (rt_a[1:] == rt_a[:-1]) & (room_a[1:] == room_a[:-1])
+        # half-open [start, end) overlap of consecutive stays
+        if (same_room & (e[:-1] > s[1:]) & (s[:-1] < e[1:])).any():
+            hard_ok = False
 
     # Soft: serial order per family/type; forced honored
     soft_violations: List[str] = []
+    # Numeric part of every distinct room label, extracted once (None when there is none)
+    room_num = {r: extract_room_number(r) for r in df["room"].unique()}
+
+    def sort_key(r: str):
+        n = room_num[r]
+        return (float("inf") if n is None else n, r)  # same order as _room_sort_key
+
     for family, fam_grp in df.groupby("family"):
-        for rt, rt_grp in fam_grp.groupby("room_type"):
-            rooms = list(rt_grp["room"])
+        # Split the family's rooms by type in one pass (no nested groupby per family)
+        rooms_by_rt: Dict[str, List[str]] = {}
+        for rt, room in zip(fam_grp["room_type"], fam_grp["room"]):
+            rooms_by_rt.setdefault(rt, []).append(room)
+        for rt in sorted(rooms_by_rt):
+            rooms = rooms_by_rt[rt]
             if len(rooms) > 1:
-                rooms_sorted = sorted(rooms, key=_room_sort_key)
-                ok = True
-                for i in range(len(rooms_sorted) - 1):
-                    if not are_serial(rooms_sorted[i], rooms_sorted[i + 1]):
-                        ok = False
-                        break
+                rooms_sorted = sorted(rooms, key=sort_key)
+                nums = [room_num[r] for r in rooms_sorted]
+                # Serial ⇔ numbers step by exactly one (ascending after the sort)
+                ok = None not in nums and all(b - a == 1 for a, b in zip(nums, nums[1:]))
                 if not ok:
                     soft_violations.append(f"{family}/{rt}: rooms not in serial order ({', '.join(rooms_sorted)}).")
-        for _, row in fam_grp.iterrows():
+        for row in fam_grp.to_dict("records"):
             fr = str(row.get("forced_room", "")).strip()
             if fr and str(row["room"]).strip() != fr:
                 soft_violations.append(f"{family}: forced {fr} not met (got {row['room']}).")
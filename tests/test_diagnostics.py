@@ -0,0 +1,43 @@
+# tests/test_diagnostics.py
+import pandas as pd
+
+from logic.diagnostics import explain_soft_constraints
+
+_COLS = ["family", "room_type", "check_in", "check_out", "room"]
+
+
+def _explain(assigned_rows, rooms):
+    assigned_df = pd.DataFrame(assigned_rows, columns=_COLS)
+    families_df = assigned_df.drop(columns="room").assign(forced_room="")
+    rooms_df = pd.DataFrame(rooms, columns=["room_type", "room"])
+    return explain_soft_constraints(assigned_df, families_df, rooms_df)
+
+
+def test_mixed_types_group_family_names_that_differ_by_whitespace():
+    # Same family as the solver sees it (it strips names), typed with a trailing space once
+    out = _explain(
+        [
+            ("Cohen", "שטח", "01/07/2025", "03/07/2025", "3"),
+            ("Cohen ", "זוגי", "01/07/2025", "03/07/2025", "2"),
+        ],
+        [("שטח", str(n)) for n in range(1, 6)] + [("זוגי", "1"), ("זוגי", "2")],
+    )
+    mixed = out[out["violation"] == "mixed_שטח_זוגי"]
+    assert mixed[["family", "room_type"]].values.tolist() == [["Cohen", "זוגי"]]
+
+
+def test_family_does_not_block_its_own_serial_block():
+    # Levi's second row carries a trailing space; its stay in room 4 is still Levi's own,
+    # so rooms 3–4 are a free serial block (room 2 is taken by another family)
+    out = _explain(
+        [
+            ("Levi", "משפחתי", "01/07/2025", "03/07/2025", "1"),
+            ("Kahn", "משפחתי", "01/07/2025", "03/07/2025", "2"),
+            ("Levi ", "משפחתי", "01/07/2025", "03/07/2025", "4"),
+        ],
+        [("משפחתי", str(n)) for n in range(1, 5)],
+    )
+    row = out[out["violation"] == "non_serial"].iloc[0]
+    assert row["family"] == "Levi"
+    assert row["feasible_serial_block"] == "3 4"
+    assert row["blockers"] == ""
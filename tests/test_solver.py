@@ -0,0 +1,138 @@
+# tests/test_solver.py
+import random
+
+import pandas as pd
+import pytest
+
+from logic import solver
+from logic.solver import (
+    Booking, Room, _epoch_days, _search_assignments, _solve_type, assign_rooms, build_field_groups,
+)
+
+
+def _bookings(room_type, rows):
+    """Bookings from (family, check_in, check_out[, forced_room]) rows, as assign_rooms builds them."""
+    days = _epoch_days([row[1] for row in rows] + [row[2] for row in rows])
+    return [
+        Booking(idx=i, family=row[0], room_type=room_type, check_in=row[1], check_out=row[2],
+                forced_room=row[3] if len(row) > 3 else "", ci_day=days[i], co_day=days[len(rows) + i])
+        for i, row in enumerate(rows)
+    ]
+
+
+def _search(room_type, labels, rows, optimize=False):
+    bookings = _bookings(room_type, rows)
+    rooms = [Room(room=label, room_type=room_type) for label in labels]
+    found, complete, _, _ = _search_assignments(
+        bookings, rooms, build_field_groups(bookings),
+        waive_serial=False, waive_forced=False, time_limit_sec=60.0,
+        node_limit=500_000, log=lambda _m: None, use_soft=True, optimize=optimize,
+    )
+    return found, complete
+
+
+def test_partial_tiebreak_scores_placement_before_it_is_made():
+    # Five stays, four rooms: every best partial places four rows, so the soft penalty picks
+    # between them. A placement is charged the penalty it was ranked by, i.e. against the
+    # family's previous room; f0 getting the serial pair 4/5 beats 4/6.
+    rows = [
+        ("f0", "02/07/2025", "04/07/2025"),
+        ("f1", "02/07/2025", "05/07/2025"),
+        ("f1", "02/07/2025", "05/07/2025"),
+        ("f0", "02/07/2025", "05/07/2025"),
+        ("f0", "02/07/2025", "03/07/2025"),
+    ]
+    found, complete = _search("זוגי", ["4", "8", "5", "6"], rows)
+    assert not complete
+    assert found == {0: "4", 1: "8", 2: "6", 3: "5"}
+
+
+def test_optimize_scores_serial_adjacency():
+    # The first rung that completes waives the serial rule; optimizing must still pick 1/2
+    families = pd.DataFrame({
+        "family": ["f", "f"], "room_type": ["זוגי", "זוגי"],
+        "check_in": ["01/07/2025"] * 2, "check_out": ["03/07/2025"] * 2, "forced_room": ["", ""],
+    })
+    rooms = pd.DataFrame({"room_type": ["זוגי"] * 3, "room": ["1", "5", "2"]})
+    plain, _ = assign_rooms(families, rooms, max_workers=1)
+    optimized, _ = assign_rooms(families, rooms, max_workers=1, optimize=True)
+    assert plain["room"].tolist() == ["1", "5"]
+    assert optimized["room"].tolist() == ["1", "2"]
+
+
+def test_branch_and_bound_matches_exhaustive_search(monkeypatch):
+    # Pruning by the penalty floor must never cut off the cheapest complete map
+    rnd = random.Random(7)
+    for _ in range(40):
+        room_type = rnd.choice(["זוגי", "שטח"])
+        labels = [str(n) for n in rnd.sample(range(1, 19), rnd.randint(3, 6))]
+        rows = []
+        for _ in range(rnd.randint(2, len(labels))):
+            ci = rnd.randint(1, 4)
+            rows.append((f"f{rnd.randint(0, 1)}", f"{ci:02d}/07/2025", f"{ci + rnd.randint(1, 3):02d}/07/2025"))
+        pruned = _search(room_type, labels, rows, optimize=True)
+        monkeypatch.setattr(solver, "_BRANCH_AND_BOUND", False)
+        exhaustive = _search(room_type, labels, rows, optimize=True)
+        monkeypatch.setattr(solver, "_BRANCH_AND_BOUND", True)
+        assert pruned == exhaustive
+
+
+# --- CP-SAT completion in _solve_type --------------------------------------------------------
+
+_ROOMS = [Room(room=label, room_type="זוגי") for label in ("1", "2")]
+_ROWS = [
+    ("f0", "01/07/2025", "03/07/2025"),
+    ("f1", "01/07/2025", "03/07/2025"),
+    ("f2", "01/07/2025", "03/07/2025"),
+    ("f3", "31/02/2025", "03/07/2025"),        # unparseable check_in
+    ("f4", "05/07/2025", "05/07/2025"),        # check_out <= check_in
+    ("f5", "01/07/2025", "03/07/2025", "9"),   # forced room missing from the catalog
+]
+
+
+def _completion(monkeypatch, search_map, cp_map, rows=_ROWS):
+    """Run _solve_type with a fixed search result; returns (map, bookings CP-SAT was given)."""
+    monkeypatch.setattr(solver, "_search_assignments", lambda *a, **k: (dict(search_map), False, 1, False))
+    monkeypatch.setattr(solver, "cp_model", object())  # as if OR-Tools were installed
+    modelled = []
+
+    def fake_cp_sat(bookings, rooms, hint, time_limit_sec):
+        modelled.append(sorted(b.idx for b in bookings))
+        assert hint == search_map
+        return cp_map
+
+    monkeypatch.setattr(solver, "_cp_sat_assign", fake_cp_sat)
+    best_map, _ = _solve_type("זוגי", _bookings("זוגי", rows), _ROOMS, 60.0, 1000, True, log=lambda _m: None)
+    return best_map, modelled
+
+
+def test_cp_sat_models_only_rows_it_could_place(monkeypatch):
+    _, modelled = _completion(monkeypatch, {0: "1"}, None)
+    assert modelled == [[0, 1, 2]]
+
+
+def test_cp_sat_replaces_search_map_only_on_strict_gain(monkeypatch):
+    search_map = {0: "1"}
+    best_map, _ = _completion(monkeypatch, search_map, {1: "1"})
+    assert best_map == search_map
+    best_map, _ = _completion(monkeypatch, search_map, {0: "2", 1: "1"})
+    assert best_map == {0: "2", 1: "1"}
+
+
+def test_cp_sat_skipped_when_only_unplaceable_rows_are_missing(monkeypatch):
+    # without f2, the search's f0/f1 fill both rooms and only the rows it can't model are missing
+    rows = [row for row in _ROWS if row[0] != "f2"]
+    best_map, modelled = _completion(monkeypatch, {0: "1", 1: "2"}, {0: "1", 1: "2", 2: "1"}, rows)
+    assert modelled == []
+    assert best_map == {0: "1", 1: "2"}
+
+
+def test_cp_sat_completes_a_partial_search():
+    pytest.importorskip("ortools")
+    rows = [(f"f{i}", "01/07/2025", "03/07/2025") for i in range(2)] + [("f2", "03/07/2025", "05/07/2025")]
+    bookings = _bookings("זוגי", rows)
+    # one node: the search stops after its first placement, CP-SAT places the rest
+    best_map, lines = _solve_type("זוגי", bookings, _ROOMS, 60.0, 1, False)
+    assert sorted(best_map) == [0, 1, 2]
+    assert best_map[0] != best_map[1]
+    assert any("CP-SAT completion" in line for line in lines)
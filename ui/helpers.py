@@ -3,10 +3,13 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime as dt
 import html
+import io
 import re
 from urllib.request import urlopen
 from logic.utils import _room_sort_key  # you already have this
 
+_DIGITS_RE = re.compile(r"(\d+)")  # numeric core of a room label
+
 # ----------------- Session & CSV helpers -----------------
 
 def ensure_session_keys() -> None:
@@ -92,6 +95,11 @@ def read_csv(src):
                 "Could not parse CSV. The file may be invalid or use an unexpected delimiter."
             ) from exc
 
+@st.cache_data(show_spinner=False, max_entries=8)  # bounded like _solve_cached: one entry per upload
+def read_csv_bytes(data: bytes) -> pd.DataFrame:
+    """read_csv for uploaded file contents, cached on the bytes so reruns skip re-parsing."""
+    return read_csv(io.BytesIO(data))
+
 # ----------------- DataFrame helpers -----------------
 
 def with_dt_cols(df: pd.DataFrame) -> pd.DataFrame:
@@ -146,7 +154,7 @@ def highlight_forced(row):
         s = str(val).strip()
         if s == "":
             return ""
-        m = re.search(r"(\d+)", s)
+        m = _DIGITS_RE.search(s)
         # If there are digits, compare by numeric core; otherwise compare as-is
         return m.group(1) if m else s
 
@@ -162,6 +170,36 @@ def highlight_forced(row):
     color = "background-color: #e6ffed" if ok else "background-color: #ffe6e6"
     return [color] * len(row)
 
+def highlight_forced_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Same coloring as highlight_forced, computed for the whole table at once
+    (use with Styler.apply(..., axis=None) instead of a Python call per row).
+    """
+    styles = pd.DataFrame("", index=df.index, columns=df.columns)
+    if "forced_room" not in df.columns:
+        return styles
+
+    def text(col: str) -> pd.Series:
+        # str() per cell exactly like the row-wise version (None → "None", NaN → "nan")
+        return df[col].astype(object).map(str).str.strip()
+
+    def norm(s: pd.Series) -> pd.Series:
+        # numeric core when there are digits, else the value itself ("" stays "")
+        return s.str.extract(_DIGITS_RE, expand=False).fillna(s)
+
+    fr = text("forced_room")
+    assigned = pd.Series("", index=df.index, dtype=object)
+    if "room" in df.columns:
+        assigned = text("room")
+    if "room_num" in df.columns:
+        assigned = assigned.where(assigned != "", text("room_num"))
+
+    ok = assigned.ne("") & norm(assigned).eq(norm(fr))
+    color = ok.map({True: "background-color: #e6ffed", False: "background-color: #ffe6e6"}).where(fr != "", "")
+    for col in styles.columns:
+        styles[col] = color
+    return styles
+
 def unique_values(df: pd.DataFrame, col: str) -> list[str]:
     """Safely get sorted unique values or empty list if col missing/empty df."""
     if df is None or df.empty or col not in df.columns:
@@ -294,7 +332,7 @@ def build_day_sheet_sections(
     if isinstance(assigned_df, pd.DataFrame) and not assigned_df.empty:
         a = assigned_df.copy()
         # keys to map a unique booking row: family + room_type + dates
-        for _, r in a.iterrows():
+        for r in a.to_dict("records"):
             key = (
                 str(r.get("family", "")).strip(),
                 str(r.get("room_type", "")).strip(),
@@ -331,7 +369,7 @@ def build_day_sheet_sections(
     active["__section"] = active["room_type"].map(section_for)
     out: dict[str, list[dict]] = {}
 
-    for _, row in active.sort_values(["__section", "room_type", "family"]).iterrows():
+    for row in active.sort_values(["__section", "room_type", "family"]).to_dict("records"):
         key = (
             str(row.get("family", "")).strip(),
             str(row.get("room_type", "")).strip(),
@@ -369,7 +407,7 @@ def build_day_sheet_sections(
     # Add empty units (from rooms.csv) that are not used by any active row
     if include_empty_units and not room_catalog.empty:
         used = {(sec, r["unit"]) for sec, rows in out.items() for r in rows if r.get("unit")}
-        for _, rr in room_catalog.sort_values(["__section", "room"]).iterrows():
+        for rr in room_catalog.sort_values(["__section", "room"]).to_dict("records"):
             key2 = (rr["__section"], rr["room"])
             if key2 not in used:
                 out.setdefault(rr["__section"], []).append({
@@ -429,8 +467,10 @@ def daily_sheet_html(sections: dict[str, list[dict]], on_date: dt) -> str:
 __all__ = [
     "ensure_session_keys",
     "read_csv",
+    "read_csv_bytes",
     "with_dt_cols",
     "highlight_forced",
+    "highlight_forced_frame",
     "unique_values",
     "family_filters_ui",
     "roomtype_filters_ui",
@@ -2,12 +2,41 @@ import streamlit as st
 import pandas as pd
 from logic.solver import assign_rooms
 
-def run_assignment():
+def _solve(
+    families_df: pd.DataFrame,
+    rooms_df: pd.DataFrame,
+    time_limit_sec: float,
+    node_limit: int,
+    solve_per_type: bool,
+    use_soft: bool,
+    optimize: bool = False,
+):
+    """Run the solver and collect its log lines."""
+    log_lines: list[str] = []
+    assigned_df, unassigned_df = assign_rooms(
+        families_df,
+        rooms_df,
+        log_func=log_lines.append,
+        time_limit_sec=time_limit_sec,
+        node_limit=node_limit,
+        solve_per_type=solve_per_type,
+        use_soft=use_soft,
+        optimize=optimize,
+    )
+    return assigned_df, unassigned_df, log_lines
+
+# Solve once per distinct inputs/settings; Streamlit reruns reuse the result and its log.
+# Bounded, since every upload/option combination would otherwise stay in memory.
+_solve_cached = st.cache_data(show_spinner=False, max_entries=8)(_solve)
+
+def run_assignment(fresh: bool = False):
     """
     Recalculate room assignments using fixed solver budgets:
       - time_limit_sec = 60.0 seconds per room_type
       - node_limit = 500_000 nodes per room_type
       - solve_per_type = True
+    fresh=True bypasses the result cache: the solve is time-budgeted, so an explicit
+    recalculation may find a better assignment (the cached entry is left as it was).
     """
     # Initialize/clear log
     st.session_state["log_lines"] = []
@@ -26,16 +55,20 @@ def run_assignment():
 
     # NEW: read toggle (default True)
     use_soft = bool(st.session_state.get("use_soft_constraints", True))
+    # Opt-in: spend the rest of each type's budget lowering the soft penalty (default False)
+    optimize = bool(st.session_state.get("optimize_soft_penalty", False))
 
-    assigned_df, unassigned_df = assign_rooms(
+    solve = _solve if fresh else _solve_cached
+    assigned_df, unassigned_df, log_lines = solve(
         families_df,
         rooms_df,
-        log_func=lambda msg: st.session_state["log_lines"].append(msg),
-        time_limit_sec=time_limit_sec,
-        node_limit=node_limit,
-        solve_per_type=solve_per_type,
-        use_soft=use_soft,   # <<--- pass the flag
+        time_limit_sec,
+        node_limit,
+        solve_per_type,
+        use_soft,   # <<--- pass the flag
+        optimize,
     )
+    st.session_state["log_lines"].extend(log_lines)
 
     st.session_state["assigned"]   = assigned_df
     st.session_state["unassigned"] = unassigned_df
@@ -5,7 +5,7 @@ from datetime import datetime as dt, time
 
 from .helpers import (
     with_dt_cols,
-    highlight_forced,       # colors forced rows: green if met, red if not
+    highlight_forced_frame, # colors forced rows: green if met, red if not
     unique_values,
     family_filters_ui,
     roomtype_filters_ui,
@@ -75,8 +75,16 @@ def _safe_pick_cols(df: pd.DataFrame, wanted: list[str]) -> pd.DataFrame:
 # =========================
 def render_recalc_button():
     if not st.session_state["families"].empty and not st.session_state["rooms"].empty:
+        st.checkbox(
+            "Optimize soft preferences",
+            value=False,
+            key="optimize_soft_penalty",
+            help="Keep searching after a full assignment for one with fewer soft-rule penalties, "
+                 "serial adjacency included (can use up to twice each room type's time budget, "
+                 "so solving is slower).",
+        )
         if st.button("🔁 Recalculate Assignment"):
-            run_assignment()
+            run_assignment(fresh=True)
 
 
 # =========================
@@ -108,7 +116,7 @@ def render_assigned_overview():
                 overview = assigned_all_view.reindex(columns=desired).copy()
                 overview = _safe_sort_by_room(overview, "room")
                 display_cols = ["family", "room_type", "room_num", "check_in", "check_out", "forced_room"]
-                st.write(overview[display_cols].style.apply(highlight_forced, axis=1))
+                st.write(overview[display_cols].style.apply(highlight_forced_frame, axis=None))
             else:
                 st.info("📭 No rows match the current filters.")
 
@@ -122,7 +130,7 @@ def render_assigned_overview():
             un_df = unassigned_df.drop(columns=["id"], errors="ignore")
             # Pick common columns if present; style for forced color too
             un_df = _safe_pick_cols(un_df, SAFE_UNASSIGNED_COLS)
-            st.write(un_df.style.apply(highlight_forced, axis=1))
+            st.write(un_df.style.apply(highlight_forced_frame, axis=None))
             csv_un = unassigned_df.to_csv(index=False).encode("utf-8-sig")
             st.download_button("📥 Download Unassigned", csv_un, "unassigned_families.csv", "text/csv")
 
@@ -184,7 +192,7 @@ def render_date_or_range_view():
         if not assigned_filtered.empty:
             # Table
             display_cols = ["family", "room_type", "room_num", "check_in", "check_out", "forced_room"]
-            st.write(assigned_filtered[display_cols].style.apply(highlight_forced, axis=1))
+            st.write(assigned_filtered[display_cols].style.apply(highlight_forced_frame, axis=None))
             # NEW: download button (range)
             ex_df = assigned_filtered[display_cols].copy()
             csv_bytes = ex_df.to_csv(index=False).encode("utf-8-sig")
@@ -203,7 +211,7 @@ def render_date_or_range_view():
         if not unassigned_filtered.empty:
             unv = unassigned_filtered.drop(columns=["id"], errors="ignore")
             unv = _safe_pick_cols(unv, SAFE_UNASSIGNED_COLS)
-            st.write(unv.style.apply(highlight_forced, axis=1))
+            st.write(unv.style.apply(highlight_forced_frame, axis=None))
         else:
             st.info("📭 No unassigned families in that range.")
     else:
@@ -236,7 +244,7 @@ def render_date_or_range_view():
         if not assigned_filtered.empty:
             # Table
             display_cols = ["family", "room_type", "room_num", "check_in", "check_out", "forced_room"]
-            st.write(assigned_filtered[display_cols].style.apply(highlight_forced, axis=1))
+            st.write(assigned_filtered[display_cols].style.apply(highlight_forced_frame, axis=None))
             # NEW: download button (single day)
             ex_df = assigned_filtered[display_cols].copy()
             csv_bytes = ex_df.to_csv(index=False).encode("utf-8-sig")
@@ -254,7 +262,7 @@ def render_date_or_range_view():
         if not unassigned_filtered.empty:
             unv = unassigned_filtered.drop(columns=["id"], errors="ignore")
             unv = _safe_pick_cols(unv, SAFE_UNASSIGNED_COLS)
-            st.write(unv.style.apply(highlight_forced, axis=1))
+            st.write(unv.style.apply(highlight_forced_frame, axis=None))
         else:
             st.info("📭 No unassigned families on that date.")
 
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from .helpers import read_csv
+from .helpers import read_csv, read_csv_bytes
 from .runner import run_assignment
 
 from logic.solver   import assign_rooms
@@ -66,9 +66,9 @@ def render_uploads():
             )
 
         if fam_file:
-            st.session_state["families"] = read_csv(fam_file)
+            st.session_state["families"] = read_csv_bytes(fam_file.getvalue())
         if room_file:
-            st.session_state["rooms"] = read_csv(room_file)
+            st.session_state["rooms"] = read_csv_bytes(room_file.getvalue())
 
     # Auto run after both are present and no prior assignment
     if (